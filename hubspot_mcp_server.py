@@ -6,21 +6,40 @@ Provides 5 tools to manage HubSpot contacts and deals via MCP.
 """
 
 import asyncio
-import logging
 import os
 import json
 import sys
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
+import ijson
+from cachetools import LRUCache, TTLCache
 from dotenv import load_dotenv
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# picologging is a drop-in stdlib logging replacement with cheaper records
+try:
+    import picologging as logging
+except ImportError:
+    import logging
+
 # Windows asyncio fix - CRITICAL!
 if sys.platform == 'win32':
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+else:
+    # libuv-backed loop is faster for socket-heavy workloads on POSIX
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
 
 # Load environment
 load_dotenv()
@@ -38,81 +57,197 @@ app = Server("hubspot-mcp-server")
 # HubSpot configuration
 HUBSPOT_TOKEN = os.getenv("HUBSPOT_ACCESS_TOKEN", "")
 HUBSPOT_BASE = "https://api.hubapi.com"
-HEADERS_TEMPLATE = {
-    "Content-Type": "application/json"
-}
+# Pre-encoded once at import; skips str->bytes header normalization per call
+_DEFAULT_HEADERS = [
+    (b"Authorization", f"Bearer {HUBSPOT_TOKEN}".encode("latin-1")),
+    (b"Content-Type", b"application/json")
+]
 
 # Rate limit config (basic client-side throttle)
 MAX_RPS = int(os.getenv("MAX_REQUESTS_PER_SECOND", "10"))
 
+# Short-lived cache for get_contact so repeat reads skip the HTTP round-trip
+GET_CACHE_SIZE = int(os.getenv("GET_CACHE_SIZE", "1024"))
+GET_CACHE_TTL = int(os.getenv("GET_CACHE_TTL_SECONDS", "60"))
+_GET_CACHE: TTLCache = TTLCache(maxsize=GET_CACHE_SIZE, ttl=GET_CACHE_TTL)
+
+# Only fetch the properties the response actually renders unless the caller
+# asks for more; smaller payloads mean less transfer and less parsing
+_DEFAULT_GET_PROPERTIES = "email,firstname,lastname,phone,company"
+
+# (etag, data) per (contact, properties) key, kept past the TTL so expired
+# reads can revalidate with If-None-Match and skip the body on a 304
+_ETAG_CACHE: LRUCache = LRUCache(maxsize=GET_CACHE_SIZE)
+
+# In-flight GETs by (contact_id, properties): readers await the first fetch
+_INFLIGHT: Dict[Tuple[str, str], asyncio.Future] = {}
+_INFLIGHT_LOCK = asyncio.Lock()
+
+
+class _TokenBucket:
+    """Token-bucket limiter: capacity tokens, refilled at rate tokens/sec."""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.last_refill = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, cost: float = 1):
+        """Wait until cost tokens are available, then consume them."""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            if self.last_refill:
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            if self.tokens < cost:
+                await asyncio.sleep((cost - self.tokens) / self.rate)
+                self.last_refill = loop.time()
+                self.tokens = 0.0
+            else:
+                self.tokens -= cost
+
+
+_BUCKET = _TokenBucket(MAX_RPS, MAX_RPS)
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize to compact JSON (orjson when available, stdlib otherwise)."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON bytes (orjson when available, stdlib otherwise)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Tool schemas are immutable; build them once at import instead of per call
+_TOOLS: List[Tool] = [
+    Tool(
+        name="create_contact",
+        description="Create a new contact in HubSpot",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "email": {"type": "string"},
+                "firstname": {"type": "string"},
+                "lastname": {"type": "string"},
+                "phone": {"type": "string"},
+                "company": {"type": "string"}
+            },
+            "required": ["email"]
+        }
+    ),
+    Tool(
+        name="search_contacts",
+        description="Search contacts by query term",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "query": {"type": "string"},
+                "limit": {"type": "integer", "default": 10}
+            },
+            "required": ["query"]
+        }
+    ),
+    Tool(
+        name="get_contact",
+        description="Get contact details by ID (optionally a custom property list)",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "contact_id": {"type": "string"},
+                "properties": {"type": "array", "items": {"type": "string"}}
+            },
+            "required": ["contact_id"]
+        }
+    ),
+    Tool(
+        name="update_contact",
+        description="Update a contact's properties",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "contact_id": {"type": "string"},
+                "properties": {"type": "object"}
+            },
+            "required": ["contact_id", "properties"]
+        }
+    ),
+    Tool(
+        name="create_deal",
+        description="Create a new deal",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "dealname": {"type": "string"},
+                "amount": {"type": "number"},
+                "dealstage": {"type": "string"},
+                "pipeline": {"type": "string"}
+            },
+            "required": ["dealname"]
+        }
+    ),
+    Tool(
+        name="batch_create_contacts",
+        description="Create up to 100 contacts per API call",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "contacts": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "email": {"type": "string"},
+                            "firstname": {"type": "string"},
+                            "lastname": {"type": "string"},
+                            "phone": {"type": "string"},
+                            "company": {"type": "string"}
+                        },
+                        "required": ["email"]
+                    }
+                }
+            },
+            "required": ["contacts"]
+        }
+    ),
+    Tool(
+        name="batch_create_deals",
+        description="Create up to 100 deals per API call",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "deals": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "dealname": {"type": "string"},
+                            "amount": {"type": "number"},
+                            "dealstage": {"type": "string"},
+                            "pipeline": {"type": "string"}
+                        },
+                        "required": ["dealname"]
+                    }
+                }
+            },
+            "required": ["deals"]
+        }
+    )
+]
+
 
 @app.list_tools()
 async def list_tools() -> List[Tool]:
     """Register HubSpot tools."""
-    return [
-        Tool(
-            name="create_contact",
-            description="Create a new contact in HubSpot",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "email": {"type": "string"},
-                    "firstname": {"type": "string"},
-                    "lastname": {"type": "string"},
-                    "phone": {"type": "string"},
-                    "company": {"type": "string"}
-                },
-                "required": ["email"]
-            }
-        ),
-        Tool(
-            name="search_contacts",
-            description="Search contacts by query term",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "query": {"type": "string"},
-                    "limit": {"type": "integer", "default": 10}
-                },
-                "required": ["query"]
-            }
-        ),
-        Tool(
-            name="get_contact",
-            description="Get full contact details by ID",
-            inputSchema={
-                "type": "object",
-                "properties": {"contact_id": {"type": "string"}},
-                "required": ["contact_id"]
-            }
-        ),
-        Tool(
-            name="update_contact",
-            description="Update a contact's properties",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "contact_id": {"type": "string"},
-                    "properties": {"type": "object"}
-                },
-                "required": ["contact_id", "properties"]
-            }
-        ),
-        Tool(
-            name="create_deal",
-            description="Create a new deal",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "dealname": {"type": "string"},
-                    "amount": {"type": "number"},
-                    "dealstage": {"type": "string"},
-                    "pipeline": {"type": "string"}
-                },
-                "required": ["dealname"]
-            }
-        )
-    ]
+    return _TOOLS
 
 
 @app.call_tool()
@@ -122,16 +257,9 @@ async def call_tool(name: str, arguments: Any) -> List[TextContent]:
         if not HUBSPOT_TOKEN:
             return [TextContent(type="text", text="Error: HUBSPOT_ACCESS_TOKEN not configured.")]
 
-        if name == "create_contact":
-            return await handle_create_contact(arguments)
-        if name == "search_contacts":
-            return await handle_search_contacts(arguments)
-        if name == "get_contact":
-            return await handle_get_contact(arguments)
-        if name == "update_contact":
-            return await handle_update_contact(arguments)
-        if name == "create_deal":
-            return await handle_create_deal(arguments)
+        handler = _DISPATCH.get(name)
+        if handler is not None:
+            return await handler(arguments)
 
         return [TextContent(type="text", text=f"Unknown tool: {name}" )]
 
@@ -140,22 +268,76 @@ async def call_tool(name: str, arguments: Any) -> List[TextContent]:
         return [TextContent(type="text", text=f"Error: {str(e)}")]
 
 
-async def _request(method: str, path: str, json_data: Optional[Dict] = None, params: Optional[Dict] = None) -> Dict:
-    """Helper for HTTP requests with common headers and error handling."""
-    headers = {**HEADERS_TEMPLATE, "Authorization": f"Bearer {HUBSPOT_TOKEN}"}
-    url = f"{HUBSPOT_BASE}{path}"
-    async with httpx.AsyncClient(timeout=30.0) as client:
+# Shared HTTP client (created lazily so it binds to the running event loop)
+_CLIENT: Optional[httpx.AsyncClient] = None
+_CLIENT_LOCK = asyncio.Lock()
+
+
+async def _get_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient, creating it on first use."""
+    global _CLIENT
+    if _CLIENT is None:
+        async with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _CLIENT = httpx.AsyncClient(
+                    base_url=HUBSPOT_BASE,
+                    http2=True,
+                    timeout=30.0,
+                    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                    headers=_DEFAULT_HEADERS
+                )
+    return _CLIENT
+
+
+async def _close_client():
+    """Close the shared client on shutdown."""
+    global _CLIENT
+    if _CLIENT is not None:
+        await _CLIENT.aclose()
+        _CLIENT = None
+
+
+class _AsyncStreamReader:
+    """Minimal async file-like adapter so ijson can consume httpx streams."""
+
+    def __init__(self, aiter):
+        self._aiter = aiter
+
+    async def read(self, size=-1):
+        if size == 0:
+            # ijson probes with read(0) to detect bytes vs str; don't let the
+            # probe swallow the first chunk of the body
+            return b""
         try:
-            response = await client.request(method, url, headers=headers, json=json_data, params=params)
-        except httpx.RequestError as e:
-            logger.error("Request error: %s", e)
-            raise
+            return await self._aiter.__anext__()
+        except StopAsyncIteration:
+            return b""
+
+
+async def _send(method: str, path: str, json_data: Optional[Dict] = None, params: Optional[Dict] = None,
+                headers: Optional[Dict] = None) -> httpx.Response:
+    """Issue a rate-limited request on the shared client; raise on 4xx/5xx."""
+    await _BUCKET.acquire()
+    client = await _get_client()
+    try:
+        response = await client.request(method, path, headers=headers, json=json_data, params=params)
+    except httpx.RequestError as e:
+        logger.error("Request error: %s", e)
+        raise
 
     if response.status_code >= 400:
-        logger.error("HubSpot API error %s: %s", response.status_code, response.text)
-        raise Exception(f"HubSpot API {response.status_code}: {response.text}")
+        # decode (and keep) at most 512 bytes of the error body
+        detail = response.content[:512].decode("utf-8", "replace")
+        logger.error("HubSpot API error %s: %s", response.status_code, detail)
+        raise Exception(f"HubSpot API {response.status_code}: {detail}")
+
+    return response
 
-    return response.json()
+
+async def _request(method: str, path: str, json_data: Optional[Dict] = None, params: Optional[Dict] = None) -> Dict:
+    """Helper for HTTP requests with common headers and error handling."""
+    response = await _send(method, path, json_data=json_data, params=params)
+    return _loads(response.content)
 
 
 async def handle_create_contact(arguments: Dict[str, Any]) -> List[TextContent]:
@@ -164,15 +346,11 @@ async def handle_create_contact(arguments: Dict[str, Any]) -> List[TextContent]:
     if not email:
         return [TextContent(type="text", text="Missing required parameter: email")]
 
+    # build the dict once, skipping absent fields as we go
     properties = {
-        "email": email,
-        "firstname": arguments.get("firstname"),
-        "lastname": arguments.get("lastname"),
-        "phone": arguments.get("phone"),
-        "company": arguments.get("company")
+        k: v for k in ("email", "firstname", "lastname", "phone", "company")
+        if (v := arguments.get(k)) is not None
     }
-    # remove None values
-    properties = {k: v for k, v in properties.items() if v is not None}
 
     body = {"properties": properties}
 
@@ -206,31 +384,86 @@ async def handle_search_contacts(arguments: Dict[str, Any]) -> List[TextContent]
     }
 
     try:
-        data = await _request("POST", "/crm/v3/objects/contacts/search", json_data=body)
-        results = data.get("results", [])
+        # stream the response and parse results incrementally instead of
+        # materializing the whole page before projecting three fields
+        await _BUCKET.acquire()
+        client = await _get_client()
         items = []
-        for r in results:
-            pid = r.get("id")
-            props = r.get("properties", {})
-            name = f"{props.get('firstname','')} {props.get('lastname','')}".strip()
-            items.append({"id": pid, "email": props.get("email"), "name": name})
-
-        text = f"Found {len(items)} contacts for query '{query}':\n" + json.dumps(items, indent=2)
+        async with client.stream("POST", "/crm/v3/objects/contacts/search", json=body) as response:
+            if response.status_code >= 400:
+                detail = (await response.aread())[:512].decode("utf-8", "replace")
+                logger.error("HubSpot API error %s: %s", response.status_code, detail)
+                raise Exception(f"HubSpot API {response.status_code}: {detail}")
+            reader = _AsyncStreamReader(response.aiter_bytes())
+            async for r in ijson.items(reader, "results.item"):
+                pid = r.get("id")
+                props = r.get("properties", {})
+                name = f"{props.get('firstname','')} {props.get('lastname','')}".strip()
+                items.append({"id": pid, "email": props.get("email"), "name": name})
+
+        text = f"Found {len(items)} contacts for query '{query}':\n" + _dumps(items)
         return [TextContent(type="text", text=text)]
     except Exception as e:
         logger.error("search_contacts failed: %s", e)
         return [TextContent(type="text", text=f"search_contacts error: {str(e)}")]
 
 
+async def _fetch_contact(contact_id: str, props_csv: str) -> Dict:
+    """Fetch a contact, coalescing concurrent requests for the same key."""
+    key = (contact_id, props_csv)
+    async with _INFLIGHT_LOCK:
+        fut = _INFLIGHT.get(key)
+        if fut is not None:
+            owner = False
+        else:
+            fut = asyncio.get_running_loop().create_future()
+            _INFLIGHT[key] = fut
+            owner = True
+
+    if not owner:
+        return await fut
+
+    try:
+        cached = _ETAG_CACHE.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else None
+        response = await _send("GET", f"/crm/v3/objects/contacts/{contact_id}",
+                               params={"properties": props_csv}, headers=headers)
+        if response.status_code == 304:
+            data = cached[1]
+        else:
+            data = _loads(response.content)
+            etag = response.headers.get("ETag")
+            if etag:
+                _ETAG_CACHE[key] = (etag, data)
+        _GET_CACHE[key] = data
+        fut.set_result(data)
+        return data
+    except Exception as e:
+        fut.set_exception(e)
+        fut.exception()  # mark retrieved in case no one else is waiting
+        raise
+    finally:
+        if not fut.done():
+            # owner was cancelled mid-fetch; wake coalesced waiters instead
+            # of leaving them awaiting a future that never resolves
+            fut.cancel()
+        _INFLIGHT.pop(key, None)
+
+
 async def handle_get_contact(arguments: Dict[str, Any]) -> List[TextContent]:
-    """Retrieve full contact details by id."""
+    """Retrieve contact details by id, fetching only the needed properties."""
     contact_id = arguments.get("contact_id")
     if not contact_id:
         return [TextContent(type="text", text="Missing required parameter: contact_id")]
 
+    requested = arguments.get("properties")
+    props_csv = ",".join(requested) if requested else _DEFAULT_GET_PROPERTIES
+
     try:
-        data = await _request("GET", f"/crm/v3/objects/contacts/{contact_id}")
-        text = f"Contact {contact_id}:\n" + json.dumps(data, indent=2)
+        data = _GET_CACHE.get((contact_id, props_csv))
+        if data is None:
+            data = await _fetch_contact(contact_id, props_csv)
+        text = f"Contact {contact_id}:\n" + _dumps(data)
         return [TextContent(type="text", text=text)]
     except Exception as e:
         logger.error("get_contact failed: %s", e)
@@ -247,7 +480,10 @@ async def handle_update_contact(arguments: Dict[str, Any]) -> List[TextContent]:
     body = {"properties": properties}
     try:
         data = await _request("PATCH", f"/crm/v3/objects/contacts/{contact_id}", json_data=body)
-        text = f"Contact updated: id={contact_id}\n" + json.dumps(data.get('properties', {}), indent=2)
+        # drop every cached property view of this contact after a write
+        for key in [k for k in list(_GET_CACHE) if k[0] == contact_id]:
+            _GET_CACHE.pop(key, None)
+        text = f"Contact updated: id={contact_id}\n" + _dumps(data.get('properties', {}))
         return [TextContent(type="text", text=text)]
     except Exception as e:
         logger.error("update_contact failed: %s", e)
@@ -279,10 +515,95 @@ async def handle_create_deal(arguments: Dict[str, Any]) -> List[TextContent]:
         return [TextContent(type="text", text=f"create_deal error: {str(e)}")]
 
 
+async def _probe_http_version():
+    """Log which HTTP version was negotiated with api.hubapi.com."""
+    try:
+        client = await _get_client()
+        response = await client.get("/crm/v3/objects/contacts", params={"limit": 1})
+        logger.info("HubSpot connection negotiated %s", response.http_version)
+    except Exception as e:
+        logger.warning("HTTP version probe failed: %s", e)
+
+
+# HubSpot batch endpoints accept at most 100 inputs per call
+_BATCH_LIMIT = 100
+
+
+async def handle_batch_create_contacts(arguments: Dict[str, Any]) -> List[TextContent]:
+    """Create many contacts in one batch call per 100 records."""
+    contacts = arguments.get("contacts")
+    if not contacts:
+        return [TextContent(type="text", text="Missing required parameter: contacts")]
+
+    inputs = []
+    for c in contacts:
+        if not c.get("email"):
+            return [TextContent(type="text", text="Each contact requires an email")]
+        properties = {k: v for k, v in c.items() if v is not None}
+        inputs.append({"properties": properties})
+
+    try:
+        created_ids = []
+        for start in range(0, len(inputs), _BATCH_LIMIT):
+            body = {"inputs": inputs[start:start + _BATCH_LIMIT]}
+            data = await _request("POST", "/crm/v3/objects/contacts/batch/create", json_data=body)
+            created_ids.extend(r.get("id") for r in data.get("results", []))
+        text = f"Created {len(created_ids)} contacts: ids={', '.join(created_ids)}"
+        return [TextContent(type="text", text=text)]
+    except Exception as e:
+        logger.error("batch_create_contacts failed: %s", e)
+        return [TextContent(type="text", text=f"batch_create_contacts error: {str(e)}")]
+
+
+async def handle_batch_create_deals(arguments: Dict[str, Any]) -> List[TextContent]:
+    """Create many deals in one batch call per 100 records."""
+    deals = arguments.get("deals")
+    if not deals:
+        return [TextContent(type="text", text="Missing required parameter: deals")]
+
+    inputs = []
+    for d in deals:
+        if not d.get("dealname"):
+            return [TextContent(type="text", text="Each deal requires a dealname")]
+        properties = {k: v for k, v in d.items() if v is not None}
+        if "amount" in properties:
+            properties["amount"] = str(properties["amount"])
+        inputs.append({"properties": properties})
+
+    try:
+        created_ids = []
+        for start in range(0, len(inputs), _BATCH_LIMIT):
+            body = {"inputs": inputs[start:start + _BATCH_LIMIT]}
+            data = await _request("POST", "/crm/v3/objects/deals/batch/create", json_data=body)
+            created_ids.extend(r.get("id") for r in data.get("results", []))
+        text = f"Created {len(created_ids)} deals: ids={', '.join(created_ids)}"
+        return [TextContent(type="text", text=text)]
+    except Exception as e:
+        logger.error("batch_create_deals failed: %s", e)
+        return [TextContent(type="text", text=f"batch_create_deals error: {str(e)}")]
+
+
+# O(1) tool-name -> handler routing for call_tool
+_DISPATCH = {
+    "create_contact": handle_create_contact,
+    "search_contacts": handle_search_contacts,
+    "get_contact": handle_get_contact,
+    "update_contact": handle_update_contact,
+    "create_deal": handle_create_deal,
+    "batch_create_contacts": handle_batch_create_contacts,
+    "batch_create_deals": handle_batch_create_deals,
+}
+
+
 async def main():
     logger.info("Starting HubSpot MCP Server...")
-    async with stdio_server() as (r, w):
-        await app.run(r, w, app.create_initialization_options())
+    if HUBSPOT_TOKEN:
+        await _probe_http_version()
+    try:
+        async with stdio_server() as (r, w):
+            await app.run(r, w, app.create_initialization_options())
+    finally:
+        await _close_client()
 
 
 if __name__ == "__main__":
@@ -10,39 +10,48 @@ import json
 from dotenv import load_dotenv
 import httpx
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps_pretty(obj):
+    """Indented JSON via orjson when available, stdlib otherwise."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, indent=2)
+
+
+def loads(data: bytes):
+    """Parse response bytes directly, skipping the bytes->str detour."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 load_dotenv()
 TOKEN = os.getenv("HUBSPOT_ACCESS_TOKEN")
 BASE = "https://api.hubapi.com"
 HEADERS = {"Authorization": f"Bearer {TOKEN}", "Content-Type": "application/json"}
 
-async def create_contact(email: str):
+async def create_contact(client: httpx.AsyncClient, email: str):
     body = {"properties": {"email": email, "firstname": "Test", "lastname": "Runner"}}
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.post(f"{BASE}/crm/v3/objects/contacts", headers=HEADERS, json=body)
-        return r
+    return await client.post(f"{BASE}/crm/v3/objects/contacts", headers=HEADERS, json=body)
 
-async def search_contacts(query: str):
+async def search_contacts(client: httpx.AsyncClient, query: str):
     body = {"filterGroups": [{"filters": [{"value": query, "propertyName": "email", "operator": "CONTAINS_TOKEN"}]}], "properties": ["email","firstname","lastname"], "limit": 10}
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.post(f"{BASE}/crm/v3/objects/contacts/search", headers=HEADERS, json=body)
-        return r
+    return await client.post(f"{BASE}/crm/v3/objects/contacts/search", headers=HEADERS, json=body)
 
-async def get_contact(cid: str):
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.get(f"{BASE}/crm/v3/objects/contacts/{cid}", headers=HEADERS)
-        return r
+async def get_contact(client: httpx.AsyncClient, cid: str):
+    return await client.get(f"{BASE}/crm/v3/objects/contacts/{cid}", headers=HEADERS)
 
-async def update_contact(cid: str):
+async def update_contact(client: httpx.AsyncClient, cid: str):
     body = {"properties": {"phone": "+15555550123"}}
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.patch(f"{BASE}/crm/v3/objects/contacts/{cid}", headers=HEADERS, json=body)
-        return r
+    return await client.patch(f"{BASE}/crm/v3/objects/contacts/{cid}", headers=HEADERS, json=body)
 
-async def create_deal():
+async def create_deal(client: httpx.AsyncClient):
     body = {"properties": {"dealname": "Test Deal via script", "amount": "1000"}}
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.post(f"{BASE}/crm/v3/objects/deals", headers=HEADERS, json=body)
-        return r
+    return await client.post(f"{BASE}/crm/v3/objects/deals", headers=HEADERS, json=body)
 
 async def run_all():
     if not TOKEN:
@@ -52,39 +61,42 @@ async def run_all():
     timestamp = int(time.time())
     test_email = f"test_{timestamp}_{uuid.uuid4().hex[:6]}@example.com"
 
-    print(f"Creating contact {test_email}...")
-    r1 = await create_contact(test_email)
-    print(r1.status_code, r1.text)
-    if r1.status_code != 201:
-        print("create_contact failed")
-        return 1
-    cid = r1.json().get("id")
-
-    print("Searching for contacts with 'test'...")
-    r2 = await search_contacts("test")
-    print(r2.status_code)
-    try:
-        print(json.dumps(r2.json(), indent=2))
-    except Exception:
-        print(r2.text)
-
-    print(f"Getting contact {cid}...")
-    r3 = await get_contact(cid)
-    print(r3.status_code)
-    print(r3.text)
-
-    print(f"Updating contact {cid}...")
-    r4 = await update_contact(cid)
-    print(r4.status_code)
-    print(r4.text)
-
-    print("Creating deal...")
-    r5 = await create_deal()
-    print(r5.status_code)
-    print(r5.text)
-
-    print("Tests complete. Consider deleting test data manually if desired.")
-    return 0
+    # one HTTP/2 client for the whole run: calls multiplex over one connection
+    async with httpx.AsyncClient(http2=True, timeout=30, limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)) as client:
+        print(f"Creating contact {test_email}...")
+        r1 = await create_contact(client, test_email)
+        print(r1.status_code, r1.text)
+        if r1.status_code != 201:
+            print("create_contact failed")
+            return 1
+        cid = loads(r1.content).get("id")
+
+        # search, get and deal creation are independent - run them concurrently
+        print(f"Searching for 'test', getting contact {cid} and creating deal concurrently...")
+        r2, r3, r5 = await asyncio.gather(
+            search_contacts(client, "test"),
+            get_contact(client, cid),
+            create_deal(client),
+        )
+        print("search:", r2.status_code)
+        try:
+            print(dumps_pretty(loads(r2.content)))
+        except Exception:
+            print(r2.text)
+
+        print("get:", r3.status_code)
+        print(r3.text)
+
+        print("deal:", r5.status_code)
+        print(r5.text)
+
+        print(f"Updating contact {cid}...")
+        r4 = await update_contact(client, cid)
+        print(r4.status_code)
+        print(r4.text)
+
+        print("Tests complete. Consider deleting test data manually if desired.")
+        return 0
 
 if __name__ == "__main__":
     code = asyncio.run(run_all())